@@ -0,0 +1,78 @@
+"""
+对比两次基准测试结果，发现性能回退
+
+    python -m benchmarks.compare base.json new.json --threshold 0.10
+
+有指标变差超过阈值时以退出码 1 结束。
+"""
+import argparse
+import json
+import sys
+
+# 每类基准的关键字段、主指标和指标方向(True 表示越大越好)
+KEYS = {
+    "ingest": ("file_type", "rows"),
+    "page": ("file_type", "rows", "depth"),
+    "stats": ("total_data_rows",),
+    "concurrency": ("clients",),
+}
+METRICS = {
+    "ingest": [("rows_per_second", True), ("peak_memory_bytes", False)],
+    "page": [("p50_ms", False), ("p95_ms", False)],
+    "stats": [("p50_ms", False)],
+    "concurrency": [("requests_per_second", True), ("p95_ms", False)],
+}
+
+
+def index_results(report: dict) -> dict:
+    indexed = {}
+    for result in report["results"]:
+        name = result["benchmark"]
+        key = (name,) + tuple(result.get(k) for k in KEYS[name])
+        indexed[key] = result
+    return indexed
+
+
+def compare(base: dict, new: dict, threshold: float) -> list:
+    """返回 [(key, 指标, 旧值, 新值, 变化比例, 是否回退)]"""
+    rows = []
+    base_results = index_results(base)
+    for key, result in index_results(new).items():
+        old = base_results.get(key)
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS[key[0]]:
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            rows.append((key, metric, before, after, change, worse > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对比两次基准测试结果")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="视为回退的变化比例")
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    regressions = 0
+    for key, metric, before, after, change, regressed in compare(base, new, args.threshold):
+        regressions += regressed
+        flag = "回退" if regressed else ""
+        label = " ".join(str(k) for k in key)
+        print(f"{label:<32} {metric:<20} {before:>14} -> {after:<14} {change:+.1%} {flag}")
+
+    print(f"共 {regressions} 项回退 (阈值 {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+基准测试用的合成数据文件生成器
+
+每种格式生成相同结构的行: id, name, city, score, created_at，
+CSV/JSON/TXT 边生成边写盘，不在内存里攒整份数据。
+"""
+import json
+import os
+import random
+
+CITIES = ["北京", "上海", "广州", "深圳", "杭州", "成都", "武汉", "西安"]
+
+
+def iter_rows(rows: int, seed: int = 42):
+    rnd = random.Random(seed)
+    for i in range(rows):
+        yield {
+            "id": i + 1,
+            "name": f"user_{i + 1:07d}",
+            "city": rnd.choice(CITIES),
+            "score": round(rnd.uniform(0, 100), 2),
+            "created_at": f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+        }
+
+
+def write_csv(path: str, rows: int):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("id,name,city,score,created_at\n")
+        for row in iter_rows(rows):
+            f.write(f"{row['id']},{row['name']},{row['city']},{row['score']},{row['created_at']}\n")
+
+
+def write_json(path: str, rows: int):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, row in enumerate(iter_rows(rows)):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(row, ensure_ascii=False))
+        f.write("]")
+
+
+def write_txt(path: str, rows: int):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in iter_rows(rows):
+            f.write(f"{row['created_at']} INFO [{row['city']}] {row['name']} score={row['score']}\n")
+
+
+def write_xlsx(path: str, rows: int):
+    import pandas as pd
+
+    pd.DataFrame(iter_rows(rows)).to_excel(path, index=False)
+
+
+WRITERS = {
+    "csv": write_csv,
+    "json": write_json,
+    "txt": write_txt,
+    "xlsx": write_xlsx,
+}
+
+
+def generate(directory: str, file_type: str, rows: int) -> str:
+    """生成 (或复用已生成的) 合成文件，返回路径"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"synthetic_{rows}.{file_type}")
+    if not os.path.exists(path):
+        WRITERS[file_type](path, rows)
+    return path
@@ -0,0 +1,293 @@
+"""
+导入与读取路径的基准测试
+
+在 apps/server 目录下运行:
+
+    python -m benchmarks.run --sizes 1000,10000,100000 --out bench-results.json
+
+使用本地 sqlite 代替 MySQL，测量:
+  - ingest:      /upload 每种文件类型的导入速度(行/秒)和峰值内存
+  - page:        /files/{file_id}/data 浅/深偏移分页的延迟
+  - stats:       imported_data 增长过程中 /stats 的延迟
+  - concurrency: 多客户端并发读的吞吐
+结果写成 JSON，可以用 python -m benchmarks.compare 对比两次运行。
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import generators
+
+MIME_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "txt": "text/plain",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(samples) -> dict:
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "samples": len(samples),
+    }
+
+
+def time_request(client, method: str, url: str, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.request(method, url)
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return samples
+
+
+def upload(client, path: str, file_type: str) -> dict:
+    with open(path, "rb") as f:
+        response = client.post(
+            "/upload",
+            files={"file": (os.path.basename(path), f, MIME_TYPES[file_type])},
+        )
+    response.raise_for_status()
+    return response.json()
+
+
+def wait_for_purge(file_id: str, timeout: float = 600):
+    """等后台清理删完已删除文件的数据，避免残留行影响后续的 /stats 计时"""
+    import database
+    from models import UploadFileRecord
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        db = database.SessionLocal()
+        try:
+            if db.query(UploadFileRecord.id).filter(UploadFileRecord.id == file_id).first() is None:
+                return
+        finally:
+            db.close()
+        time.sleep(0.05)
+    raise TimeoutError(f"文件 {file_id} 的数据在 {timeout}s 内未清理完")
+
+
+def bench_ingest(client, path: str, file_type: str, rows: int, measure_memory: bool) -> tuple:
+    start = time.perf_counter()
+    record = upload(client, path, file_type)
+    elapsed = time.perf_counter() - start
+    result = {
+        "benchmark": "ingest",
+        "file_type": file_type,
+        "rows": rows,
+        "file_bytes": os.path.getsize(path),
+        "seconds": round(elapsed, 4),
+        "rows_per_second": round(record["imported_rows"] / elapsed, 1) if elapsed else None,
+        "imported_rows": record["imported_rows"],
+        "peak_memory_bytes": None,
+    }
+    if measure_memory:
+        # 单独再跑一次测内存，避免 tracemalloc 的开销影响计时
+        tracemalloc.start()
+        extra = upload(client, path, file_type)
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        client.delete(f"/files/{extra['id']}").raise_for_status()
+        wait_for_purge(extra["id"])
+    return result, record
+
+
+def bench_stats(client, repeat: int) -> dict:
+    samples = time_request(client, "GET", "/stats", repeat)
+    total_rows = client.get("/stats").json()["total_data_rows"]
+    return {"benchmark": "stats", "total_data_rows": total_rows, **latency_summary(samples)}
+
+
+def bench_pages(client, record: dict, file_type: str, rows: int, page_size: int, repeat: int) -> list:
+    total = record["imported_rows"]
+    results = []
+    for depth, skip in (("shallow", 0), ("deep", max(total - page_size, 0))):
+        url = f"/files/{record['id']}/data?skip={skip}&limit={page_size}"
+        samples = time_request(client, "GET", url, repeat)
+        results.append({
+            "benchmark": "page",
+            "file_type": file_type,
+            "rows": rows,
+            "depth": depth,
+            "skip": skip,
+            "limit": page_size,
+            **latency_summary(samples),
+        })
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app):
+    """在线程里启动 uvicorn；lifespan 已由外层 TestClient 运行，这里关闭，避免重复启动/停止后台清理"""
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def bench_concurrency(base_url: str, paths: list, clients: int, duration: float) -> dict:
+    deadline = time.perf_counter() + duration
+
+    def worker(offset: int):
+        samples, errors, i = [], 0, offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + path) as response:
+                    response.read()
+            except Exception:
+                errors += 1
+                continue
+            samples.append(time.perf_counter() - start)
+        return samples, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        outcomes = list(pool.map(worker, range(clients)))
+    elapsed = time.perf_counter() - started
+
+    samples = [s for outcome in outcomes for s in outcome[0]]
+    errors = sum(outcome[1] for outcome in outcomes)
+    return {
+        "benchmark": "concurrency",
+        "clients": clients,
+        "seconds": round(elapsed, 3),
+        "requests": len(samples),
+        "errors": errors,
+        "requests_per_second": round(len(samples) / elapsed, 1),
+        **(latency_summary(samples) if samples else {}),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="导入与读取路径的基准测试")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="每个文件的行数，逗号分隔，如 1000,10000,100000,1000000")
+    parser.add_argument("--types", default="csv,json,txt,xlsx", help="文件类型，逗号分隔")
+    parser.add_argument("--workdir", default=".bench", help="sqlite 库、上传目录和生成文件的位置")
+    parser.add_argument("--out", default="bench-results.json", help="结果 JSON 文件")
+    parser.add_argument("--repeat", type=int, default=20, help="每个读请求重复次数")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--clients", default="1,4,16", help="并发客户端数，逗号分隔")
+    parser.add_argument("--duration", type=float, default=5.0, help="每档并发持续秒数")
+    parser.add_argument("--no-memory", action="store_true", help="不测峰值内存")
+    parser.add_argument("--text-index", action="store_true", help="文本文件使用行偏移索引模式(TEXT_LINE_INDEX=1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+    workdir = os.path.abspath(args.workdir)
+
+    # 每次运行都从空库开始，生成的数据文件保留复用
+    db_path = os.path.join(workdir, "bench.db")
+    upload_dir = os.path.join(workdir, "uploads")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    shutil.rmtree(upload_dir, ignore_errors=True)
+    os.makedirs(workdir, exist_ok=True)
+
+    # 必须在导入 config/database/main 之前设置
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["UPLOAD_DIR"] = upload_dir
+    os.environ["APP_SUBSYSTEMS"] = "ingest"
+    os.environ["CSV_TABLE_IMPORT"] = "0"
+    os.environ["TEXT_LINE_INDEX"] = "1" if args.text_index else "0"
+    os.environ["PURGE_PAUSE_SECONDS"] = "0"
+
+    from fastapi.testclient import TestClient
+    import database
+    import main as server
+
+    database.init_db()
+    app = server.create_app()
+    results = []
+    # 用 with 运行应用的 lifespan，后台清理线程才会启动
+    with TestClient(app) as client:
+        for rows in sizes:
+            for file_type in types:
+                path = generators.generate(os.path.join(workdir, "data"), file_type, rows)
+                ingest, record = bench_ingest(client, path, file_type, rows, not args.no_memory)
+                results.append(ingest)
+                print(f"ingest {file_type:>4} {rows:>8} 行: {ingest['rows_per_second']} 行/秒", flush=True)
+                results.extend(bench_pages(client, record, file_type, rows, args.page_size, args.repeat))
+                results.append(bench_stats(client, args.repeat))
+
+        read_paths = ["/stats", "/files"] + [
+            f"/files/{f['id']}/data?skip=0&limit={args.page_size}"
+            for f in client.get("/files?limit=100").json()["items"]
+        ]
+        server_handle, thread, base_url = start_server(app)
+        try:
+            for clients in sorted(int(c) for c in args.clients.split(",")):
+                result = bench_concurrency(base_url, read_paths, clients, args.duration)
+                results.append(result)
+                print(f"concurrency {clients:>3} 客户端: {result['requests_per_second']} 请求/秒", flush=True)
+        finally:
+            server_handle.should_exit = True
+            thread.join()
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "database": "sqlite",
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
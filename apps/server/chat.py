@@ -0,0 +1,39 @@
+import pyttsx3
+from ollama import chat, ChatResponse
+
+from config import OLLAMA_MODEL
+
+
+def chat_with_ollama(text: str) -> str:
+    """调用 Ollama 回答一次，并朗读回复"""
+    engine = pyttsx3.init()
+    # url = f"http://localhost:11434/api/chat"  # Ollama 本地 API 地址
+
+    # 用户输入
+    user_input = text
+    if user_input.startswith("退出"):
+        print("对话结束，再见！")
+        engine.say("对话结束，再见！")
+        engine.runAndWait()
+        return "对话结束，再见！"
+    print("你: ", user_input)
+
+    # 发送请求到 Ollama API
+    response: ChatResponse = chat(model=OLLAMA_MODEL, stream=True, messages=[
+        {"role": "system", "content": "你是一个友好的 AI 助手，随时准备回答用户的问题。"},
+        {"role": "user", "content": user_input}
+    ])
+
+    # 实时输出 AI 回复
+    print("AI: ", end="", flush=True)
+    ai_response = ""
+    for chunk in response:
+        if chunk.message and chunk.message.content:
+            data = chunk.message.content
+            print(data, end="", flush=True)
+            ai_response += data
+    print()
+    engine.say(ai_response)
+    engine.runAndWait()
+    engine.stop()
+    return ai_response
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from config import UPLOAD_DIR, UPLOAD_SESSION_TTL_SECONDS
+
+# 分片上传会话目录，每个会话三个文件:
+#   {id}.json    会话信息(文件名、大小、分片大小、校验和)
+#   {id}.part    预先分配好大小的目标文件，分片按偏移直接写入
+#   {id}.chunks  每个分片一个字节，写完分片后置 1，支持并行、乱序上传
+# 完成时把 {id}.json 改名为 {id}.completing 来占用会话，保证只有一个请求在完成
+SESSION_DIR = os.path.join(UPLOAD_DIR, "sessions")
+
+_READ_BLOCK = 1024 * 1024
+
+# 每个会话一把锁: 分片的每次写入在锁内检查会话仍可上传，占用/取消也在锁内进行，
+# 占用之后已打开文件的分片请求不会再写入正在校验或已移走的文件(单进程内有效)
+_session_locks = {}
+_session_locks_guard = threading.Lock()
+
+
+def _session_lock(upload_id: str):
+    with _session_locks_guard:
+        return _session_locks.setdefault(upload_id, threading.RLock())
+
+
+class UploadSessionError(Exception):
+    """分片上传会话相关错误，status_code 对应返回的 HTTP 状态码"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadSession:
+    def __init__(self, upload_id: str, filename: str, total_size: int,
+                 chunk_size: int, sha256: str = None, created_at: float = None):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.total_size = total_size
+        self.chunk_size = chunk_size
+        self.sha256 = sha256
+        self.created_at = created_at or time.time()
+
+    @property
+    def total_chunks(self) -> int:
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(SESSION_DIR, f"{self.upload_id}.json")
+
+    @property
+    def completing_path(self) -> str:
+        return os.path.join(SESSION_DIR, f"{self.upload_id}.completing")
+
+    @property
+    def part_path(self) -> str:
+        return os.path.join(SESSION_DIR, f"{self.upload_id}.part")
+
+    @property
+    def bitmap_path(self) -> str:
+        return os.path.join(SESSION_DIR, f"{self.upload_id}.chunks")
+
+    def chunk_length(self, index: int) -> int:
+        """第 index 个分片应有的字节数，最后一片可能较短"""
+        if index < 0 or index >= self.total_chunks:
+            raise UploadSessionError(f"分片序号超出范围: {index}，共 {self.total_chunks} 片")
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+
+    def _check_open(self):
+        """会话已被占用(正在完成)时返回 409，已完成或取消时返回 404"""
+        if os.path.exists(self.meta_path):
+            return
+        if os.path.exists(self.completing_path):
+            raise UploadSessionError("上传会话正在完成", status_code=409)
+        raise UploadSessionError("上传会话不存在", status_code=404)
+
+    @contextmanager
+    def _locked(self):
+        """持有会话锁并确认会话仍可上传；期间会话文件被删除时同样返回 404"""
+        with _session_lock(self.upload_id):
+            self._check_open()
+            try:
+                yield
+            except FileNotFoundError:
+                raise UploadSessionError("上传会话不存在", status_code=404)
+
+    def _bitmap(self) -> bytes:
+        try:
+            with open(self.bitmap_path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise UploadSessionError("上传会话不存在", status_code=404)
+
+    def received_chunks(self) -> list:
+        return [i for i, flag in enumerate(self._bitmap()) if flag]
+
+    def missing_chunks(self) -> list:
+        return [i for i, flag in enumerate(self._bitmap()) if not flag]
+
+    def open_chunk(self, index: int):
+        """打开目标文件并定位到分片起始处，返回文件对象和该分片应写入的字节数"""
+        length = self.chunk_length(index)
+        with self._locked():
+            f = open(self.part_path, "r+b")
+        f.seek(index * self.chunk_size)
+        return f, length
+
+    def write_chunk(self, f, data: bytes):
+        """把一段分片数据写入 open_chunk 打开的文件，会话已被占用或删除时拒绝写入"""
+        with self._locked():
+            f.write(data)
+            f.flush()
+
+    def mark_received(self, index: int, received: bool = True):
+        with self._locked():
+            with open(self.bitmap_path, "r+b") as f:
+                f.seek(index)
+                f.write(b"\x01" if received else b"\x00")
+
+    def verify(self, sha256: str = None):
+        """检查分片齐全并校验 SHA-256"""
+        missing = self.missing_chunks()
+        if missing:
+            raise UploadSessionError(f"还有 {len(missing)} 个分片未上传", status_code=409)
+        expected = (sha256 or self.sha256 or "").lower()
+        if not expected:
+            raise UploadSessionError("缺少 sha256 校验和")
+        digest = hashlib.sha256()
+        with open(self.part_path, "rb") as f:
+            for block in iter(lambda: f.read(_READ_BLOCK), b""):
+                digest.update(block)
+        if digest.hexdigest() != expected:
+            raise UploadSessionError("文件校验失败，sha256 不一致", status_code=422)
+
+    def claim(self):
+        """
+        原子地占用会话，用于完成或取消，并发请求中只有一个能成功
+
+        在会话锁内改名，正在进行的分片写入先写完，之后的写入都会被拒绝
+        """
+        with _session_lock(self.upload_id):
+            try:
+                os.rename(self.meta_path, self.completing_path)
+            except FileNotFoundError:
+                self._check_open()
+                raise UploadSessionError("上传会话正在完成", status_code=409)
+
+    def release(self):
+        """完成失败(如校验不通过)时释放会话，可以继续上传或重试"""
+        with _session_lock(self.upload_id):
+            os.rename(self.completing_path, self.meta_path)
+
+    def move_to(self, file_path: str):
+        """校验通过后把组装好的文件移到上传目录，并清理会话"""
+        os.replace(self.part_path, file_path)
+        self.discard()
+
+    def discard(self):
+        with _session_lock(self.upload_id):
+            for path in (self.part_path, self.bitmap_path, self.meta_path, self.completing_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        with _session_locks_guard:
+            _session_locks.pop(self.upload_id, None)
+
+    def to_dict(self) -> dict:
+        received = self.received_chunks()
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "total_size": self.total_size,
+            "chunk_size": self.chunk_size,
+            "total_chunks": self.total_chunks,
+            "received_chunks": received,
+            "completed": len(received) == self.total_chunks,
+        }
+
+
+def create_session(filename: str, total_size: int, chunk_size: int, sha256: str = None) -> UploadSession:
+    cleanup_expired()
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    session = UploadSession(str(uuid.uuid4()), filename, total_size, chunk_size, sha256)
+    # 预分配目标文件(稀疏文件)，各分片可以直接写到自己的偏移处
+    with open(session.part_path, "wb") as f:
+        f.truncate(total_size)
+    with open(session.bitmap_path, "wb") as f:
+        f.write(b"\x00" * session.total_chunks)
+    with open(session.meta_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "filename": filename,
+            "total_size": total_size,
+            "chunk_size": chunk_size,
+            "sha256": sha256,
+            "created_at": session.created_at,
+        }, f, ensure_ascii=False)
+    return session
+
+
+def get_session(upload_id: str) -> UploadSession:
+    try:
+        uuid.UUID(upload_id)
+    except ValueError:
+        raise UploadSessionError("上传会话不存在", status_code=404)
+    meta_path = os.path.join(SESSION_DIR, f"{upload_id}.json")
+    if os.path.exists(os.path.join(SESSION_DIR, f"{upload_id}.completing")):
+        raise UploadSessionError("上传会话正在完成", status_code=409)
+    if not os.path.exists(meta_path):
+        raise UploadSessionError("上传会话不存在", status_code=404)
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    return UploadSession(upload_id, **meta)
+
+
+def cleanup_expired():
+    """删除超过有效期没有任何上传活动的会话"""
+    if not os.path.isdir(SESSION_DIR):
+        return
+    deadline = time.time() - UPLOAD_SESSION_TTL_SECONDS
+    for name in os.listdir(SESSION_DIR):
+        upload_id, suffix = os.path.splitext(name)
+        if suffix not in (".json", ".completing"):
+            continue
+        session = UploadSession(upload_id, "", 0, 1)
+        # 按会话各文件最近的修改时间判断: 每次写分片都会更新 .part 和 .chunks，
+        # 上传很慢的大文件只要还在传就不会过期；完成过程中崩溃遗留的 .completing 也会被清理
+        mtimes = []
+        for path in (session.part_path, session.bitmap_path, os.path.join(SESSION_DIR, name)):
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                continue
+        if mtimes and max(mtimes) < deadline:
+            try:
+                session.discard()
+            except OSError:
+                continue
@@ -0,0 +1,59 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _split(value: str) -> set:
+    """把逗号分隔的配置解析成集合"""
+    return {item.strip().lower() for item in value.split(",") if item.strip()}
+
+
+# 可选子系统: ingest(文件导入), speech(语音识别), chat(对话/TTS)
+ALL_SUBSYSTEMS = {"ingest", "speech", "chat"}
+
+# 挂载哪些子系统的路由，只跑 API 时可设为空: APP_SUBSYSTEMS=
+ENABLED_SUBSYSTEMS = _split(os.getenv("APP_SUBSYSTEMS", "ingest,speech,chat")) & ALL_SUBSYSTEMS
+
+# 启动时预加载的子系统，其余在第一次使用时才加载
+PRELOAD_SUBSYSTEMS = _split(os.getenv("PRELOAD_SUBSYSTEMS", "")) & ENABLED_SUBSYSTEMS
+
+# 配置文件上传目录
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+
+# CSV 上传时是否额外用 LOAD DATA 整表导入 graph 库
+CSV_TABLE_IMPORT = os.getenv("CSV_TABLE_IMPORT", "1") == "1"
+
+# 语音识别模型路径
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "model/vosk-model-small-cn-0.22")
+
+# 对话使用的模型名称（确保已通过 Ollama 下载）
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "deepseek-r1:1.5b")
+
+CORS_ORIGINS = [
+    "http://localhost:5173",    # Vite 开发服务器
+    "http://localhost:8080",    # 其他前端服务器
+    "http://localhost:3001"
+]
+
+# 慢请求采样分析：超过该秒数的请求把采样到的调用栈写入日志，0 表示关闭
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+# 删除文件后后台分批清理 imported_data: 每批行数、批间停顿、轮询间隔(秒)
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "5000"))
+PURGE_PAUSE_SECONDS = float(os.getenv("PURGE_PAUSE_SECONDS", "0.05"))
+PURGE_INTERVAL_SECONDS = float(os.getenv("PURGE_INTERVAL_SECONDS", "30"))
+
+# 文本文件只建立行偏移索引并按索引直接读文件，不逐行写入 imported_data
+TEXT_LINE_INDEX = os.getenv("TEXT_LINE_INDEX", "0") == "1"
+
+# 上传文件大小上限(普通上传和分片上传共用)，解析和导入会把整个文件读进内存，不宜设得过大
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(100 * 1024 * 1024)))
+
+# 分片上传: 分片大小上下限(只有一片时不受下限约束)、分片数上限、
+# 未完成会话在没有任何上传活动后的保留时间(秒)
+MAX_CHUNK_SIZE = int(os.getenv("MAX_CHUNK_SIZE", str(64 * 1024 * 1024)))
+MIN_CHUNK_SIZE = int(os.getenv("MIN_CHUNK_SIZE", str(256 * 1024)))
+MAX_CHUNKS = int(os.getenv("MAX_CHUNKS", "100000"))
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", str(24 * 3600)))
@@ -13,12 +13,19 @@ DB_USER = os.getenv("DB_USER", "jack")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_NAME = os.getenv("DB_NAME", "graph")
 
-# 创建数据库连接URL
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# 创建数据库连接URL，设置 DATABASE_URL 时优先使用（如基准测试用的 sqlite）
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# sqlite 连接需要允许跨线程使用
+connect_args = {"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
 
 # 创建引擎
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
+    connect_args=connect_args,
     pool_pre_ping=True,
     pool_recycle=3600
 )
@@ -35,4 +42,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def init_db():
+    """创建数据表（显式执行: python main.py init-db）"""
+    import models  # noqa: F401  注册所有模型
+    Base.metadata.create_all(bind=engine)
@@ -0,0 +1,160 @@
+import json
+import logging
+from typing import List
+
+import pandas as pd
+import pymysql
+from sqlalchemy.orm import Session
+
+from models import UploadFileRecord, ImportedData
+
+logger = logging.getLogger(__name__)
+
+
+def parse_csv_file(filepath):
+    """解析CSV文件"""
+    try:
+        df = pd.read_csv(filepath)
+        records = df.to_dict('records')
+        total_rows = len(df)
+        logger.info(df.head())
+        return records,total_rows
+    except Exception as e:
+        print(f"CSV解析错误: {str(e)}")
+        return [],0
+
+def parse_excel_file(filepath):
+    """解析Excel文件"""
+    try:
+        df = pd.read_excel(filepath)
+        records = df.to_dict('records')
+        total_rows = len(df)
+        return records,total_rows
+    except Exception as e:
+        logger.info(f"Excel解析错误: {str(e)}")
+        return [],0
+
+def parse_json_file(file_path: str, max_rows: int = None) -> tuple:
+    """解析JSON文件"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        # 处理不同的JSON结构
+        if isinstance(data, list):
+            data_list = data
+            total_rows = len(data_list)
+        elif isinstance(data, dict):
+            # 如果JSON是对象，尝试找到包含数据的数组
+            for key, value in data.items():
+                if isinstance(value, list):
+                    data_list = value
+                    total_rows = len(data_list)
+                    break
+            else:
+                data_list = [data]
+                total_rows = 1
+        else:
+            data_list = [{"data": data}]
+            total_rows = 1
+
+        if max_rows:
+            data_list = data_list[:max_rows]
+
+        return data_list, total_rows
+
+    except Exception as e:
+        return [],0
+
+def parse_text_file(filepath):
+    """解析文本文件"""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        lines = content.split('\n')
+        data_list = []
+        for i, line in enumerate(lines):
+            if line.strip():  # 跳过空行
+                data_list.append({
+                    'line_number': i + 1,
+                    'content': line.strip()
+                })
+
+        total_rows = len(data_list)
+        logger.info(f"文本解析成功，共 {total_rows} 行")
+        return data_list, total_rows  # ✅ 返回2个值
+    except Exception as e:
+        logger.info(f"文本解析错误: {str(e)}")
+        return [],0
+
+def load_csv_to_mysql(file_path: str, table_name: str):
+    """把CSV文件整表导入到 graph 库中同名的表"""
+    #打开csv文件
+    config = {'host':'127.0.0.1',
+        'port':3406,
+        'user':'jack',
+        'passwd':'',
+        'charset':'utf8mb4',
+        'local_infile':1
+        }
+
+    conn = pymysql.connect(**config)
+    cur = conn.cursor()
+    database = 'graph'
+
+    data=open(file_path, 'r',encoding='utf-8')
+    #读取csv文件第一行字段名，创建表
+    reader = data.readline()
+    reader = reader.replace('\n','')
+    b = reader.split(',')
+    colum = ''
+    for a in b:
+        colum = colum + '`' + a + '`' + ' varchar(255),'
+    colum = colum[:-1]
+    #编写sql，create_sql负责创建表，data_sql负责导入数据
+    create_sql = 'create table if not exists ' + table_name + ' ' + '(' + colum + ')' + ' DEFAULT CHARSET=utf8'
+    data_sql = "LOAD DATA LOCAL INFILE '%s' INTO TABLE %s FIELDS TERMINATED BY ',' LINES TERMINATED BY '\\r\\n' IGNORE 1 LINES" % (data,table_name)
+
+    #使用数据库
+    cur.execute('use %s' % database)
+    #设置编码格式
+    cur.execute('SET NAMES utf8;')
+    cur.execute('SET character_set_connection=utf8;')
+    cur.execute('SET global local_infile = 1;')
+    #执行create_sql，创建表
+    cur.execute(create_sql)
+    #执行data_sql，导入数据
+    cur.execute(data_sql)
+    conn.commit()
+    #关闭连接
+    conn.close()
+    cur.close()
+
+def import_data_to_db(
+    db: Session,
+    file_record: UploadFileRecord,
+    data_list: List[dict]
+) -> int:
+    """导入数据到数据库"""
+    imported_count = 0
+
+    try:
+        for i, row_data in enumerate(data_list):
+            imported_data = ImportedData(
+                file_id=file_record.id,
+                row_index=i + 1,
+                data=row_data
+            )
+            db.add(imported_data)
+            imported_count += 1
+
+            # 批量提交，每100条提交一次
+            if imported_count % 100 == 0:
+                db.flush()
+
+        db.commit()
+        return imported_count
+
+    except Exception as e:
+        db.rollback()
+        raise e
@@ -1,53 +1,49 @@
-from fastapi import FastAPI, Depends,UploadFile, File, HTTPException, Query
+from fastapi import FastAPI, APIRouter, Depends,UploadFile, File, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker,Session
-import uvicorn,os
-import pandas as pd
-import json
-from fastapi.responses import JSONResponse
-from database import engine, Base, SessionLocal, get_db
+from sqlalchemy.orm import Session
+import uvicorn,os,sys,time,inspect
+from contextlib import asynccontextmanager
+from database import engine, get_db, init_db
 from models import UploadFileRecord, ImportedData,Links,family,world
 from sqlalchemy import desc
 from schemas import (
     FileUploadResponse, FileListResponse, 
     ImportProgressResponse, ImportedDataResponse,
-    ErrorResponse
+    ErrorResponse, UploadSessionCreate, UploadSessionResponse,
+    UploadSessionComplete
 )
-from typing import List
 import uuid,logging
-import pyttsx3
-import os
-import queue, json
-from ollama import chat,ChatResponse
-import sounddevice as sd
-from vosk import Model, KaldiRecognizer
 from sqlalchemy import func
-from fastapi.responses import Response
-import pymysql
-# 创建数据表
-Base.metadata.create_all(bind=engine)
+from fastapi.responses import Response, JSONResponse
+from fastapi.routing import APIRoute, Match
+from config import (
+    ENABLED_SUBSYSTEMS, PRELOAD_SUBSYSTEMS, UPLOAD_DIR, CORS_ORIGINS, CSV_TABLE_IMPORT,
+    SLOW_REQUEST_SECONDS, PROFILE_INTERVAL, TEXT_LINE_INDEX,
+    MAX_UPLOAD_SIZE, MAX_CHUNK_SIZE, MIN_CHUNK_SIZE, MAX_CHUNKS
+)
+import metrics
+import subsystems
+from purger import purger, DELETED_STATUS
+import text_index
+import chunked_upload
+
 logger=logging.getLogger(__name__)
 
-app=FastAPI(
-    title="Simple File Import API",
-    description="简单的文件数据导入数据库接口",
-    version="1.0.0"
-)
+class TrackedRoute(APIRoute):
+    """同步路由在线程池中执行，记录执行线程以便慢请求采样"""
 
-origins = [
-    "http://localhost:5173",    # Vite 开发服务器
-    "http://localhost:8080",    # 其他前端服务器
-    "http://localhost:3001"
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,      # 允许的来源列表
-    allow_credentials=True,     # 允许携带 cookie
-    allow_methods=["*"],        # 允许的方法
-    allow_headers=["*"],        # 允许的头部
-)
+    def __init__(self, path, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = metrics.track_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+# 基础路由，不依赖任何可选子系统
+router = APIRouter(route_class=TrackedRoute)
+# 文件导入相关路由，首次使用时加载 ingest 子系统
+ingest_router = APIRouter(route_class=TrackedRoute)
+speech_router = APIRouter(route_class=TrackedRoute)
+chat_router = APIRouter(route_class=TrackedRoute)
 
 # 允许的文件类型
 ALLOWED_EXTENSIONS = {'.csv', '.xlsx', '.xls', '.txt', '.json'}
@@ -59,9 +55,6 @@ ALLOWED_MIME_TYPES = {
     'application/json'
 }
 
-# 配置文件上传目录
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 def get_file_extension(filename: str) -> str:
     """获取文件扩展名"""
     return os.path.splitext(filename)[1].lower()
@@ -70,148 +63,153 @@ def get_file_name(filename: str) -> str:
     """获取文件扩展名"""
     return os.path.splitext(filename)[0].lower()
 
-@app.get('/')
+def live_files(db: Session):
+    """未被标记删除的文件"""
+    return db.query(UploadFileRecord).filter(UploadFileRecord.status != DELETED_STATUS)
+
+def deleted_file_ids(db: Session):
+    """已标记删除、数据尚待清理的文件ID子查询"""
+    return db.query(UploadFileRecord.id).filter(UploadFileRecord.status == DELETED_STATUS)
+
+@router.get('/')
 def hello():
     return {'hello':'world'}
 
-@app.get('/favicon.ico', include_in_schema=False)
+@router.get('/favicon.ico', include_in_schema=False)
 async def favicon():
     # 返回空响应
     return Response(status_code=204)  # 204 No Content
 
-@app.get('/data')
+@router.get('/data')
 def get_datas(db:Session=Depends(get_db)):
-    data = db.query(ImportedData).all()
+    """
+    所有导入到 imported_data 的数据行
+
+    注意: 以行偏移索引方式导入的文本文件(storage=line_index，TEXT_LINE_INDEX=1 时上传的 .txt)
+    不写入 imported_data，不包含在此列表中，请用 /files/{file_id}/data 分页读取
+    """
+    data = db.query(ImportedData).filter(ImportedData.file_id.notin_(deleted_file_ids(db))).all()
     return [item.to_dict() for item in data]
 
-@app.get('/links')
+@router.get('/links')
 def get_links(db:Session=Depends(get_db)):
     links = db.query(Links).all()
     return links
 
-@app.get('/family')
+@router.get('/family')
 def get_links(db:Session=Depends(get_db)):
     family = db.query(family).all()
     return family
 
-@app.get('/world')
+@router.get('/world')
 def get_world(db:Session=Depends(get_db)):
     data = db.query(world).all()
     return data
 
 
-def allowed_file(filename):
-    """检查文件扩展名是否允许"""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
-
-def parse_csv_file(filepath):
-    """解析CSV文件"""
-    try:
-        df = pd.read_csv(filepath)
-        records = df.to_dict('records')
-        total_rows = len(df)
-        logger.info(df.head())
-        return records,total_rows
-    except Exception as e:
-        print(f"CSV解析错误: {str(e)}")
-        return [],0
+def validate_filename(filename: str) -> str:
+    """检查文件名和扩展名，返回扩展名"""
+    # 验证文件
+    if not filename:
+        raise HTTPException(status_code=400, detail="文件名不能为空")
+    
+    # 检查文件扩展名
+    ext = get_file_extension(filename)
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的文件类型: {ext}，支持的类型: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    return ext
 
-def parse_excel_file(filepath):
-    """解析Excel文件"""
-    try:
-        df = pd.read_excel(filepath)
-        records = df.to_dict('records')
-        total_rows = len(df)
-        return records,total_rows
-    except Exception as e:
-        logger.info(f"Excel解析错误: {str(e)}")
-        return [],0
+@metrics.track_thread
+def process_saved_file(
+    db: Session,
+    file_id: str,
+    file_path: str,
+    original_filename: str,
+    file_size: int
+) -> dict:
+    """
+    为已保存到上传目录的文件创建记录，解析并导入数据
 
-async def parse_json_file(file_path: str, max_rows: int = None) -> tuple:
-    """解析JSON文件"""
+    解析和逐行写库都是阻塞操作，调用方通过 run_in_threadpool 执行，不占用事件循环
+    """
+    ext = get_file_extension(original_filename)
+    file_type = ext[1:]  # 去掉点号
+    
+    # 创建文件记录
+    file_record = UploadFileRecord(
+        id=file_id,
+        filename=os.path.basename(file_path),
+        original_filename=original_filename,
+        file_size=file_size,
+        file_type=file_type,
+        file_path=file_path,
+        status="processing",
+        storage=text_index.LINE_INDEX_STORAGE if ext == '.txt' and TEXT_LINE_INDEX else "rows"
+    )
+    db.add(file_record)
+    db.flush()
+    
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 处理不同的JSON结构
-        if isinstance(data, list):
-            data_list = data
-            total_rows = len(data_list)
-        elif isinstance(data, dict):
-            # 如果JSON是对象，尝试找到包含数据的数组
-            for key, value in data.items():
-                if isinstance(value, list):
-                    data_list = value
-                    total_rows = len(data_list)
-                    break
-            else:
-                data_list = [data]
-                total_rows = 1
-        else:
-            data_list = [{"data": data}]
-            total_rows = 1
-        
-        if max_rows:
-            data_list = data_list[:max_rows]
-        
-        return data_list, total_rows
-        
-    except Exception as e:
-        return [],0
+        ingest = subsystems.load("ingest")
 
-def parse_text_file(filepath):
-    """解析文本文件"""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        lines = content.split('\n')
+        # 根据文件类型解析
         data_list = []
-        for i, line in enumerate(lines):
-            if line.strip():  # 跳过空行
-                data_list.append({
-                    'line_number': i + 1,
-                    'content': line.strip()
-                })
+        total_rows = 0
+        indexed = file_record.storage == text_index.LINE_INDEX_STORAGE
+        ingest_started = time.perf_counter()
         
-        total_rows = len(data_list)
-        logger.info(f"文本解析成功，共 {total_rows} 行")
-        return data_list, total_rows  # ✅ 返回2个值
-    except Exception as e:
-        logger.info(f"文本解析错误: {str(e)}")
-        return [],0
+        with metrics.INGEST_STAGE_LATENCY.time(stage="parse", file_type=file_type):
+            if ext == '.csv':
+                data_list, total_rows = ingest.parse_csv_file(file_path)
+            elif ext in ['.xlsx', '.xls']:
+                data_list, total_rows = ingest.parse_excel_file(file_path)
+            elif ext == '.json':
+                data_list, total_rows = ingest.parse_json_file(file_path)
+            elif indexed:
+                total_rows = text_index.build_index(file_path)
+            elif ext == '.txt':
+                data_list, total_rows = ingest.parse_text_file(file_path)
 
-async def import_data_to_db(
-    db: Session,
-    file_record: UploadFileRecord,
-    data_list: List[dict]
-) -> int:
-    """导入数据到数据库"""
-    imported_count = 0
-    
-    try:
-        for i, row_data in enumerate(data_list):
-            imported_data = ImportedData(
-                file_id=file_record.id,
-                row_index=i + 1,
-                data=row_data
-            )
-            db.add(imported_data)
-            imported_count += 1
-            
-            # 批量提交，每100条提交一次
-            if imported_count % 100 == 0:
-                db.flush()
+        # CSV 额外整表导入 graph 库，单独计时，不算在解析里
+        if ext == '.csv' and CSV_TABLE_IMPORT:
+            with metrics.INGEST_STAGE_LATENCY.time(stage="table_import", file_type=file_type):
+                ingest.load_csv_to_mysql(file_path, get_file_name(original_filename))
+
+        # 更新总行数
+        file_record.total_rows = total_rows
+        
+        # 导入数据到数据库
+        if indexed:
+            # 行索引模式下数据直接从文件读取
+            imported_count = total_rows
+        else:
+            with metrics.INGEST_STAGE_LATENCY.time(stage="import", file_type=file_type):
+                imported_count = ingest.import_data_to_db(db, file_record, data_list)
+        ingest_seconds = time.perf_counter() - ingest_started
+        metrics.INGEST_ROWS.inc(imported_count, file_type=file_type)
+        if ingest_seconds > 0:
+            metrics.INGEST_ROWS_PER_SECOND.observe(imported_count / ingest_seconds, file_type=file_type)
+        
+        # 更新文件记录状态
+        file_record.status = "completed"
+        file_record.imported_rows = imported_count
+        file_record.message = f"成功导入 {imported_count} 行数据"
         
         db.commit()
-        return imported_count
+        db.refresh(file_record)
         
     except Exception as e:
-        db.rollback()
-        raise e
-
+        file_record.status = "failed"
+        file_record.message = str(e)
+        db.commit()
+        raise HTTPException(status_code=500, detail=f"数据处理失败: {str(e)}")
+    
+    return file_record.to_dict()
 
-@app.post("/upload", response_model=FileUploadResponse, responses={400: {"model": ErrorResponse}})
+@ingest_router.post("/upload", response_model=FileUploadResponse, responses={400: {"model": ErrorResponse}})
 async def upload_file(
     file: UploadFile = File(..., description="要上传的文件"),
     db: Session = Depends(get_db)
@@ -224,26 +222,16 @@ async def upload_file(
     - 返回文件处理状态
     """
     
-    # 验证文件
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="文件名不能为空")
-    
-    # 检查文件扩展名
-    ext = get_file_extension(file.filename)
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"不支持的文件类型: {ext}，支持的类型: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
+    ext = validate_filename(file.filename)
     
     try:
         # 读取文件内容
         content = await file.read()
         file_size = len(content)
         
-        # 文件大小限制 (100MB)
-        if file_size > 100 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="文件大小不能超过100MB")
+        # 文件大小限制
+        if file_size > MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=400, detail=f"文件大小不能超过{UploadFileRecord.format_size(MAX_UPLOAD_SIZE)}")
         
         # 生成唯一文件名
         file_id = str(uuid.uuid4())
@@ -251,116 +239,125 @@ async def upload_file(
         file_path = os.path.join(UPLOAD_DIR, stored_filename)
         
         # 保存文件
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        # 创建文件记录
-        file_record = UploadFileRecord(
-            id=file_id,
-            filename=stored_filename,
-            original_filename=file.filename,
-            file_size=file_size,
-            file_type=ext[1:],  # 去掉点号
-            file_path=file_path,
-            status="processing"
-        )
-        db.add(file_record)
-        db.flush()
-        
-        try:
-            # 根据文件类型解析
-            data_list = []
-            total_rows = 0
-            
-            if ext == '.csv':
-                data_list, total_rows = parse_csv_file(file_path)
-                
-                #打开csv文件
-                config = {'host':'127.0.0.1',
-                    'port':3406,
-                    'user':'jack',
-                    'passwd':'',
-                    'charset':'utf8mb4',
-                    'local_infile':1
-                    }
-
-                conn = pymysql.connect(**config)
-                cur = conn.cursor()
-                database = 'graph'                
-                
-                table_name = get_file_name(file.filename)
-
-                data=open(file_path, 'r',encoding='utf-8')
-                #读取csv文件第一行字段名，创建表
-                reader = data.readline()
-                reader = reader.replace('\n','')
-                b = reader.split(',')
-                colum = ''
-                for a in b:
-                    colum = colum + '`' + a + '`' + ' varchar(255),'
-                colum = colum[:-1]
-                #编写sql，create_sql负责创建表，data_sql负责导入数据
-                create_sql = 'create table if not exists ' + table_name + ' ' + '(' + colum + ')' + ' DEFAULT CHARSET=utf8'
-                data_sql = "LOAD DATA LOCAL INFILE '%s' INTO TABLE %s FIELDS TERMINATED BY ',' LINES TERMINATED BY '\\r\\n' IGNORE 1 LINES" % (data,table_name)
-                
-                #使用数据库
-                cur.execute('use %s' % database)
-                #设置编码格式
-                cur.execute('SET NAMES utf8;')
-                cur.execute('SET character_set_connection=utf8;')
-                cur.execute('SET global local_infile = 1;')
-                #执行create_sql，创建表
-                cur.execute(create_sql)
-                #执行data_sql，导入数据
-                cur.execute(data_sql)
-                conn.commit()
-                #关闭连接
-                conn.close()
-                cur.close()
-
-            elif ext in ['.xlsx', '.xls']:
-                data_list, total_rows = parse_excel_file(file_path)
-            elif ext == '.json':
-                data_list, total_rows = await parse_json_file(file_path)
-            elif ext == '.txt':
-                data_list, total_rows = parse_text_file(file_path)
-            
-            # 更新总行数
-            file_record.total_rows = total_rows
-            
-            # 导入数据到数据库
-            imported_count = await import_data_to_db(db, file_record, data_list)
-            
-            # 更新文件记录状态
-            file_record.status = "completed"
-            file_record.imported_rows = imported_count
-            file_record.message = f"成功导入 {imported_count} 行数据"
-            
-            db.commit()
-            db.refresh(file_record)
-            
-        except Exception as e:
-            file_record.status = "failed"
-            file_record.message = str(e)
-            db.commit()
-            raise HTTPException(status_code=500, detail=f"数据处理失败: {str(e)}")
+        file_type = ext[1:]  # 去掉点号
+        with metrics.INGEST_STAGE_LATENCY.time(stage="save", file_type=file_type):
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.write(content)
         
-        return file_record.to_dict()
+        return await run_in_threadpool(process_saved_file, db, file_id, file_path, file.filename, file_size)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"文件上传失败: {str(e)}")
 
-@app.get("/files", response_model=FileListResponse)
-async def list_files(
+@ingest_router.post("/uploads", response_model=UploadSessionResponse, responses={400: {"model": ErrorResponse}})
+def create_upload_session(body: UploadSessionCreate):
+    """
+    创建分片上传会话
+    
+    - 分片可以并行、乱序上传，中断后查询已收到的分片继续上传
+    - 全部分片上传后调用 complete，校验 sha256 并导入数据
+    """
+    validate_filename(body.filename)
+    if body.total_size > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=400, detail=f"文件大小不能超过{UploadFileRecord.format_size(MAX_UPLOAD_SIZE)}")
+    if body.chunk_size > MAX_CHUNK_SIZE:
+        raise HTTPException(status_code=400, detail=f"分片大小不能超过{UploadFileRecord.format_size(MAX_CHUNK_SIZE)}")
+    if body.chunk_size < MIN_CHUNK_SIZE and body.total_size > body.chunk_size:
+        raise HTTPException(status_code=400, detail=f"分片大小不能小于{UploadFileRecord.format_size(MIN_CHUNK_SIZE)}")
+    total_chunks = -(-body.total_size // body.chunk_size)
+    if total_chunks > MAX_CHUNKS:
+        raise HTTPException(status_code=400, detail=f"分片数不能超过 {MAX_CHUNKS}，请增大分片大小")
+    
+    session = chunked_upload.create_session(body.filename, body.total_size, body.chunk_size, body.sha256)
+    return session.to_dict()
+
+@ingest_router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+def get_upload_session(upload_id: str):
+    """查询分片上传会话及已收到的分片"""
+    return chunked_upload.get_session(upload_id).to_dict()
+
+# 分片数据攒到这么多字节再交给线程池写盘
+CHUNK_WRITE_BUFFER = 1024 * 1024
+
+@ingest_router.put("/uploads/{upload_id}/chunks/{index}")
+async def put_upload_chunk(upload_id: str, index: int, request: Request):
+    """上传一个分片，请求体为分片的原始字节，重复上传同一分片会覆盖"""
+    session = await run_in_threadpool(chunked_upload.get_session, upload_id)
+    f, length = await run_in_threadpool(session.open_chunk, index)
+    
+    # 边接收边写入目标文件的对应偏移，文件读写都放到线程池，不阻塞事件循环
+    received = 0
+    buffer = bytearray()
+    try:
+        # 重传的分片写完之前不算已收到
+        await run_in_threadpool(session.mark_received, index, False)
+        async for piece in request.stream():
+            received += len(piece)
+            if received > length:
+                raise HTTPException(status_code=400, detail=f"分片 {index} 应为 {length} 字节")
+            buffer += piece
+            if len(buffer) >= CHUNK_WRITE_BUFFER:
+                await run_in_threadpool(session.write_chunk, f, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(session.write_chunk, f, bytes(buffer))
+    finally:
+        await run_in_threadpool(f.close)
+    if received != length:
+        raise HTTPException(status_code=400, detail=f"分片 {index} 应为 {length} 字节，实际收到 {received} 字节")
+    
+    await run_in_threadpool(session.mark_received, index)
+    metrics.UPLOAD_CHUNK_BYTES.inc(received)
+    return {"upload_id": upload_id, "index": index, "size": received}
+
+def finish_upload_session(session, sha256: str, file_path: str):
+    """占用会话、校验并把文件移到上传目录；校验失败时释放会话以便重试"""
+    session.claim()
+    try:
+        with metrics.INGEST_STAGE_LATENCY.time(stage="verify", file_type=get_file_extension(session.filename)[1:]):
+            session.verify(sha256)
+    except Exception:
+        session.release()
+        raise
+    session.move_to(file_path)
+
+@ingest_router.post("/uploads/{upload_id}/complete", response_model=FileUploadResponse, responses={400: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+async def complete_upload_session(
+    upload_id: str,
+    body: UploadSessionComplete = None,
+    db: Session = Depends(get_db)
+):
+    """校验分片上传的文件，并按普通上传的流程解析、导入数据"""
+    session = await run_in_threadpool(chunked_upload.get_session, upload_id)
+    ext = validate_filename(session.filename)
+    
+    file_path = os.path.join(UPLOAD_DIR, f"{upload_id}{ext}")
+    await run_in_threadpool(finish_upload_session, session, body.sha256 if body else None, file_path)
+    return await run_in_threadpool(
+        process_saved_file, db, upload_id, file_path, session.filename, session.total_size
+    )
+
+@ingest_router.delete("/uploads/{upload_id}")
+def abort_upload_session(upload_id: str):
+    """放弃分片上传会话"""
+    session = chunked_upload.get_session(upload_id)
+    # 先占用会话，与正在进行的完成请求互斥，之后分片请求也不会再写入
+    session.claim()
+    session.discard()
+    return {"message": "已取消上传", "upload_id": upload_id}
+
+@router.get("/files", response_model=FileListResponse)
+def list_files(
     skip: int = Query(0, ge=0, description="跳过记录数"),
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
     status: str = Query(None, description="按状态筛选"),
     db: Session = Depends(get_db)
 ):
     """获取文件列表"""
-    query = db.query(UploadFileRecord)
+    query = live_files(db)
     
     if status:
         query = query.filter(UploadFileRecord.status == status)
@@ -373,26 +370,26 @@ async def list_files(
         "items": [f.to_dict() for f in files]
     }
 
-@app.get("/files/{file_id}", response_model=FileUploadResponse)
-async def get_file(
+@router.get("/files/{file_id}", response_model=FileUploadResponse)
+def get_file(
     file_id: str,
     db: Session = Depends(get_db)
 ):
     """获取文件详情"""
-    file_record = db.query(UploadFileRecord).filter(UploadFileRecord.id == file_id).first()
+    file_record = live_files(db).filter(UploadFileRecord.id == file_id).first()
     
     if not file_record:
         raise HTTPException(status_code=404, detail="文件不存在")
     
     return file_record.to_dict()
 
-@app.get("/files/{file_id}/progress", response_model=ImportProgressResponse)
-async def get_import_progress(
+@router.get("/files/{file_id}/progress", response_model=ImportProgressResponse)
+def get_import_progress(
     file_id: str,
     db: Session = Depends(get_db)
 ):
     """获取导入进度"""
-    file_record = db.query(UploadFileRecord).filter(UploadFileRecord.id == file_id).first()
+    file_record = live_files(db).filter(UploadFileRecord.id == file_id).first()
     
     if not file_record:
         raise HTTPException(status_code=404, detail="文件不存在")
@@ -411,8 +408,8 @@ async def get_import_progress(
         "message": file_record.message
     }
 
-@app.get("/files/{file_id}/data")
-async def get_imported_data(
+@router.get("/files/{file_id}/data")
+def get_imported_data(
     file_id: str,
     skip: int = Query(0, ge=0, description="跳过记录数"),
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
@@ -420,10 +417,13 @@ async def get_imported_data(
 ):
     """获取导入的数据"""
     # 检查文件是否存在
-    file_record = db.query(UploadFileRecord).filter(UploadFileRecord.id == file_id).first()
+    file_record = live_files(db).filter(UploadFileRecord.id == file_id).first()
     if not file_record:
         raise HTTPException(status_code=404, detail="文件不存在")
     
+    if file_record.storage == text_index.LINE_INDEX_STORAGE:
+        return get_indexed_text_data(file_record, skip, limit)
+    
     # 查询数据
     total = db.query(ImportedData).filter(ImportedData.file_id == file_id).count()
     data = db.query(ImportedData)\
@@ -440,13 +440,43 @@ async def get_imported_data(
         "items": [d.to_dict() for d in data]
     }
 
-@app.delete("/files/{file_id}")
-async def delete_file(
+def get_indexed_text_data(file_record: UploadFileRecord, skip: int, limit: int) -> dict:
+    """按行偏移索引从文本文件读取一页数据"""
+    created_at = file_record.created_at.strftime("%Y-%m-%d %H:%M:%S") if file_record.created_at else None
+    with text_index.LineIndex(file_record.file_path) as index:
+        total = len(index)
+        rows = index.read_page(skip, limit)
+    
+    return {
+        "file_id": file_record.id,
+        "filename": file_record.original_filename,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "items": [
+            {
+                "id": None,
+                "file_id": file_record.id,
+                "row_index": row_index,
+                "data": {"line_number": line_number, "content": content},
+                "created_at": created_at
+            }
+            for row_index, line_number, content in rows
+        ]
+    }
+
+@router.delete("/files/{file_id}")
+def delete_file(
     file_id: str,
     db: Session = Depends(get_db)
 ):
-    """删除文件记录和导入的数据"""
-    file_record = db.query(UploadFileRecord).filter(UploadFileRecord.id == file_id).first()
+    """
+    删除文件记录和导入的数据
+
+    - 立即标记为已删除，之后的查询不再返回该文件
+    - 导入的数据由后台分批清理，清理完后删除文件记录
+    """
+    file_record = live_files(db).filter(UploadFileRecord.id == file_id).first()
     
     if not file_record:
         raise HTTPException(status_code=404, detail="文件不存在")
@@ -455,13 +485,12 @@ async def delete_file(
         # 删除物理文件
         if os.path.exists(file_record.file_path):
             os.remove(file_record.file_path)
+        text_index.remove_index(file_record.file_path)
         
-        # 删除导入的数据
-        db.query(ImportedData).filter(ImportedData.file_id == file_id).delete()
-        
-        # 删除文件记录
-        db.delete(file_record)
+        # 标记删除，导入的数据交给后台清理
+        file_record.status = DELETED_STATUS
         db.commit()
+        purger.wake()
         
         return {"message": "删除成功", "file_id": file_id}
         
@@ -469,14 +498,20 @@ async def delete_file(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"删除失败: {str(e)}")
 
-@app.get("/stats")
-async def get_statistics(db: Session = Depends(get_db)):
+@router.get("/stats")
+def get_statistics(db: Session = Depends(get_db)):
     """获取统计信息"""
     # 总文件数
-    total_files = db.query(UploadFileRecord).count()
+    total_files = live_files(db).count()
     
     # 总数据行数
-    total_rows = db.query(ImportedData).count()
+    total_rows = db.query(ImportedData).filter(ImportedData.file_id.notin_(deleted_file_ids(db))).count()
+    # 行索引模式的文本文件没有 imported_data 行，按文件记录的导入行数计入
+    indexed_rows = live_files(db)\
+        .filter(UploadFileRecord.storage == text_index.LINE_INDEX_STORAGE)\
+        .with_entities(func.coalesce(func.sum(UploadFileRecord.imported_rows), 0))\
+        .scalar()
+    total_rows += indexed_rows
     
     # 成功/失败统计
     success_count = db.query(UploadFileRecord).filter(UploadFileRecord.status == "completed").count()
@@ -488,16 +523,17 @@ async def get_statistics(db: Session = Depends(get_db)):
     type_stats = db.query(
         UploadFileRecord.file_type,
         func.count(UploadFileRecord.id).label('count')
-    ).group_by(UploadFileRecord.file_type).all()
+    ).filter(UploadFileRecord.status != DELETED_STATUS).group_by(UploadFileRecord.file_type).all()
     
     # 最近上传
-    recent_files = db.query(UploadFileRecord)\
+    recent_files = live_files(db)\
         .order_by(desc(UploadFileRecord.created_at))\
         .limit(5).all()
     
     return {
         "total_files": total_files,
         "total_data_rows": total_rows,
+        "indexed_text_rows": indexed_rows,
         "status_stats": {
             "success": success_count,
             "failed": failed_count,
@@ -509,77 +545,136 @@ async def get_statistics(db: Session = Depends(get_db)):
         "recent_uploads": [f.to_dict() for f in recent_files]
     }
 
-@app.get("/speechtotext")
+@speech_router.get("/speechtotext")
 def speech_to_text():
-    # 加载离线模型（确保模型路径正确）
-    model_path = "model/vosk-model-small-cn-0.22"  # 替换为你的模型文件夹路径
-    
-    model = Model(model_path)
-    recognizer = KaldiRecognizer(model, 16000)  # 设置采样率为 16kHz
-    audio_queue = queue.Queue()
-
-    def callback(indata, frames, time, status):
-        if status:
-            logger.info(f"状态错误: {status}")
-        audio_queue.put(bytes(indata))
-
-    print("请开始说话...")
-    with sd.RawInputStream(samplerate=16000, blocksize=8000, dtype="int16",
-                           channels=1, callback=callback):
-        while True:
-            data = audio_queue.get()
-            if recognizer.AcceptWaveform(data):
-                result = recognizer.Result()
-                result=json.loads(result)['text']
-                result=result.replace(' ', '')
-                return result
-                break
-
-@app.post("/chat")
+    speech = subsystems.load("speech")
+    with metrics.SPEECH_LATENCY.time():
+        return speech.speech_to_text()
+
+@chat_router.post("/chat")
 def chat_with_ollama(text: str):
-    engine=pyttsx3.init()
-    print("欢迎使用 Ollama AI 对话功能！输入 '退出' 退出对话。")
-    model = "deepseek-r1:1.5b"  # 使用的模型名称（确保已通过 Ollama 下载）
-    # url = f"http://localhost:11434/api/chat"  # Ollama 本地 API 地址
-    conversation = []  # 用于存储对话上下文
-
-    while True:
-        # 用户输入
-        user_input=text
-        if user_input.startswith("退出") :
-            print("对话结束，再见！")
-            engine.say("对话结束，再见！")
-            engine.runAndWait()
-            break
-        else:
-            print("你: ", user_input)
+    chat = subsystems.load("chat")
+    with metrics.CHAT_LATENCY.time():
+        return chat.chat_with_ollama(text)
 
-        # 添加用户消息到上下文
-        
-        conversation.append({"role": "user", "content": user_input})
-
-        # 发送请求到 Ollama API
-        response: ChatResponse = chat(model=model, stream=True, messages=[
-            {"role": "system", "content": "你是一个友好的 AI 助手，随时准备回答用户的问题。"},
-            {"role": "user", "content": user_input}
-        ])
-
-        # 实时输出 AI 回复
-        print("AI: ", end="", flush=True)
-        ai_response = ""
-        for chunk in response:
-            if chunk.message and chunk.message.content:
-                data = chunk.message.content                     
-                print(data, end="", flush=True)
-                ai_response += data
-        engine.say(ai_response)
-        engine.runAndWait()
-        print()
-        
-        # 将 AI 回复添加到上下文
-        conversation.append({"role": "assistant", "content": ai_response})
-        engine.stop()
+
+def route_template(request) -> str:
+    """请求对应的路由模板，如 /files/{file_id}，避免按原始路径产生过多标签"""
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+def create_app(enabled: set = None, preload: set = None) -> FastAPI:
+    """
+    创建应用
+
+    - enabled: 挂载路由的子系统，默认读取 APP_SUBSYSTEMS
+    - preload: 启动时就加载的子系统，默认读取 PRELOAD_SUBSYSTEMS，其余首次使用时加载
+    """
+    enabled = ENABLED_SUBSYSTEMS if enabled is None else set(enabled)
+    preload = (PRELOAD_SUBSYSTEMS if preload is None else set(preload)) & enabled
+    started = time.perf_counter()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        purger.start()
+        for name in sorted(preload):
+            await run_in_threadpool(subsystems.load, name)
+        app.state.startup_report["subsystems"] = subsystems.report(enabled)
+        logger.info(f"启动报告: {app.state.startup_report}")
+        try:
+            yield
+        finally:
+            purger.stop()
+
+    app=FastAPI(
+        title="Simple File Import API",
+        description="简单的文件数据导入数据库接口",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS, # 允许的来源列表
+        allow_credentials=True,     # 允许携带 cookie
+        allow_methods=["*"],        # 允许的方法
+        allow_headers=["*"],        # 允许的头部
+    )
+
+    metrics.instrument_engine(engine)
+
+    @app.middleware("http")
+    async def collect_metrics(request, call_next):
+        stats, token = metrics.start_request_stats()
+        threads, threads_token = metrics.start_request_threads()
+        sampler = None
+        if SLOW_REQUEST_SECONDS > 0:
+            sampler = metrics.StackSampler(threads, PROFILE_INTERVAL)
+            sampler.start()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            if sampler is not None:
+                sampler.stop()
+            metrics.end_request_stats(token)
+            metrics.end_request_threads(threads_token)
+            route = route_template(request)
+            metrics.REQUEST_LATENCY.observe(elapsed, method=request.method, route=route)
+            metrics.REQUEST_COUNT.inc(method=request.method, route=route, status=status)
+            metrics.DB_QUERIES_PER_REQUEST.observe(stats[0], route=route)
+            metrics.DB_TIME_PER_REQUEST.observe(stats[1], route=route)
+            if sampler is not None and elapsed >= SLOW_REQUEST_SECONDS:
+                top = "\n".join(f"{count} {stack}" for stack, count in sampler.top())
+                logger.warning(f"慢请求 {request.method} {route} 耗时 {elapsed:.3f}s，采样调用栈:\n{top}")
+
+    @app.exception_handler(chunked_upload.UploadSessionError)
+    async def upload_session_error(request, exc):
+        return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
+    app.include_router(router)
+    if "ingest" in enabled:
+        app.include_router(ingest_router)
+    if "speech" in enabled:
+        app.include_router(speech_router)
+    if "chat" in enabled:
+        app.include_router(chat_router)
+
+    app.state.startup_report = {"create_app_seconds": round(time.perf_counter() - started, 4)}
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        """Prometheus 文本格式的指标"""
+        return Response(metrics.render_latest(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/startup-report", include_in_schema=False)
+    def startup_report():
+        """应用创建耗时及各子系统加载情况"""
+        return {
+            **app.state.startup_report,
+            "subsystems": subsystems.report(enabled),
+        }
+
+    return app
+
+
+app = create_app()
 
 
 if __name__=='__main__':
-    uvicorn.run('main:app',host='0.0.0.0',port=8000,reload=True)
\ No newline at end of file
+    if sys.argv[1:] == ["init-db"]:
+        # 创建数据表
+        init_db()
+    else:
+        uvicorn.run('main:app',host='0.0.0.0',port=8000,reload=True)
@@ -0,0 +1,302 @@
+import collections
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Prometheus 默认的延迟分桶(秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = collections.defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels):
+        with self._lock:
+            self._values[self._key(labels)] += amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """抓取时通过回调取当前值的指标，回调返回 {标签值元组: 数值}"""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self):
+        try:
+            items = sorted(self.callback().items()) if self.callback else []
+        except Exception as e:
+            logger.info(f"指标 {self.name} 采集失败: {str(e)}")
+            items = []
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts = {}
+        self._sums = collections.defaultdict(float)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, list(v), self._sums[k]) for k, v in self._counts.items())
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, [le])} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+REGISTRY = []
+
+
+def render_latest() -> str:
+    """按 Prometheus 文本格式输出所有指标"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP 请求耗时", ("method", "route"))
+REQUEST_COUNT = Counter("http_requests_total", "HTTP 请求数", ("method", "route", "status"))
+
+# 数据库
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "单条 SQL 耗时")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "每个请求执行的 SQL 条数", ("route",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500, 1000),
+)
+DB_TIME_PER_REQUEST = Histogram("db_time_per_request_seconds", "每个请求的 SQL 总耗时", ("route",))
+
+# 文件导入
+INGEST_STAGE_LATENCY = Histogram(
+    "ingest_stage_duration_seconds", "导入各阶段耗时(save/parse/table_import/import/verify)", ("stage", "file_type"),
+    buckets=DEFAULT_BUCKETS + (30.0, 60.0, 120.0, 300.0),
+)
+INGEST_ROWS = Counter("ingest_rows_total", "导入的行数", ("file_type",))
+INGEST_ROWS_PER_SECOND = Histogram(
+    "ingest_rows_per_second", "单个文件解析+导入的吞吐(行/秒)", ("file_type",),
+    buckets=(100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000),
+)
+
+UPLOAD_CHUNK_BYTES = Counter("upload_chunk_bytes_total", "分片上传接收的字节数")
+
+# 删除
+PURGE_ROWS = Counter("purge_rows_total", "后台清理删除的导入数据行数")
+
+# 语音 / 对话
+SPEECH_LATENCY = Histogram("speech_to_text_duration_seconds", "语音识别耗时", buckets=(0.5, 1, 2.5, 5, 10, 30, 60))
+CHAT_LATENCY = Histogram("chat_duration_seconds", "对话(LLM+TTS)耗时", buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120))
+
+
+# 当前请求的 SQL 统计: [条数, 耗时]
+_request_db = ContextVar("request_db", default=None)
+
+
+def start_request_stats():
+    stats = [0, 0.0]
+    return stats, _request_db.set(stats)
+
+
+def end_request_stats(token):
+    _request_db.reset(token)
+
+
+_instrumented_engines = []
+
+
+def instrument_engine(engine):
+    """给引擎挂上 SQL 计时，并注册连接池指标（同一引擎只挂一次）"""
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.append(engine)
+
+    # 开始时间记在本次执行的 context 上，语句失败时随 context 一起丢弃
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_query_start", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        DB_QUERY_LATENCY.observe(elapsed)
+        stats = _request_db.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+    def pool_stats():
+        pool = engine.pool
+        values = {}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                values[(name,)] = getattr(pool, name)()
+        return values
+
+    Gauge("db_pool_connections", "连接池状态(size/checkedin/checkedout/overflow)", ("state",), callback=pool_stats)
+
+
+# 当前请求用到的线程ID，供慢请求采样只看这些线程
+_request_threads = ContextVar("request_threads", default=None)
+
+# 叶子帧在这些模块里的栈视为空闲等待，不计入采样
+_IDLE_MODULES = {"threading.py", "selectors.py", "queue.py"}
+
+
+def start_request_threads() -> tuple:
+    """记录当前(事件循环)线程，返回线程集合和用于 reset 的 token"""
+    threads = {threading.get_ident()}
+    return threads, _request_threads.set(threads)
+
+
+def end_request_threads(token):
+    _request_threads.reset(token)
+
+
+def track_thread(func):
+    """包装同步的路由函数，把线程池中执行它的线程记到当前请求上"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        threads = _request_threads.get()
+        if threads is None:
+            return func(*args, **kwargs)
+        ident = threading.get_ident()
+        threads.add(ident)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            threads.discard(ident)
+    return wrapper
+
+
+class StackSampler:
+    """
+    简单的采样分析器：后台线程定期抓取请求所用线程的调用栈，
+    请求超过阈值时把出现最多的栈打到日志里
+    """
+
+    def __init__(self, threads: set, interval: float = 0.005):
+        self.threads = threads
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.threads):
+                frame = frames.get(thread_id)
+                if frame is None or os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename}:{frame.f_lineno}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def top(self, n: int = 5):
+        return self.samples.most_common(n)
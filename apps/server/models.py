@@ -2,10 +2,7 @@ from sqlalchemy import Column, Integer, String, DateTime, Text, Float, BigIntege
 from sqlalchemy.sql import func
 from database import Base
 import uuid
-from sqlalchemy.orm import declarative_base,Session
-
-# 创建对象的基类:
-Base = declarative_base()
+from sqlalchemy.orm import Session
 
 class UploadFileRecord(Base):
     """上传文件记录表"""
@@ -18,12 +15,15 @@ class UploadFileRecord(Base):
     file_type = Column(String(50), nullable=False, comment="文件类型")
     file_path = Column(String(500), nullable=False, comment="存储路径")
     
-    status = Column(String(20), default="pending", comment="状态: pending, processing, completed, failed")
+    status = Column(String(20), default="pending", comment="状态: pending, processing, completed, failed, deleted")
     message = Column(Text, comment="处理信息")
     
     total_rows = Column(Integer, default=0, comment="总行数")
     imported_rows = Column(Integer, default=0, comment="导入行数")
-    
+    # 已有的库需手动加列: ALTER TABLE upload_file_records ADD COLUMN storage VARCHAR(20) NOT NULL DEFAULT 'rows'
+    storage = Column(String(20), nullable=False, default="rows", server_default="rows",
+                     comment="数据存放方式: rows(imported_data), line_index(按行偏移索引读原文件)")
+
     created_at = Column(DateTime, server_default=func.now(), comment="创建时间")
     
     def to_dict(self):
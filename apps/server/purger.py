@@ -0,0 +1,103 @@
+import logging
+import os
+import threading
+
+from config import PURGE_CHUNK_SIZE, PURGE_PAUSE_SECONDS, PURGE_INTERVAL_SECONDS
+from database import SessionLocal
+from models import UploadFileRecord, ImportedData
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# 已标记删除、等待后台清理的文件状态
+DELETED_STATUS = "deleted"
+
+
+class Purger:
+    """
+    后台清理已删除文件的导入数据
+
+    每批只删 chunk_size 行并在批间停顿，避免大事务长时间锁住 imported_data；
+    数据删完后再删除文件记录。进程重启后会继续处理尚未清理完的文件。
+    """
+
+    def __init__(self, session_factory=SessionLocal, chunk_size: int = PURGE_CHUNK_SIZE,
+                 pause: float = PURGE_PAUSE_SECONDS, interval: float = PURGE_INTERVAL_SECONDS):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="purger", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def wake(self):
+        """有新文件被标记删除时唤醒清理线程"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.info(f"清理导入数据失败: {str(e)}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_once(self) -> int:
+        """清理所有已标记删除的文件，返回删除的数据行数"""
+        purged = 0
+        db = self.session_factory()
+        try:
+            file_ids = [row[0] for row in db.query(UploadFileRecord.id)
+                        .filter(UploadFileRecord.status == DELETED_STATUS).all()]
+            for file_id in file_ids:
+                if self._stop.is_set():
+                    break
+                purged += self.purge_file(db, file_id)
+        finally:
+            db.close()
+        return purged
+
+    def purge_file(self, db, file_id: str) -> int:
+        """分批删除一个文件的导入数据，删完后删除文件记录"""
+        purged = 0
+        while not self._stop.is_set():
+            ids = [row[0] for row in db.query(ImportedData.id)
+                   .filter(ImportedData.file_id == file_id)
+                   .limit(self.chunk_size).all()]
+            if not ids:
+                break
+            db.query(ImportedData).filter(ImportedData.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            purged += len(ids)
+            metrics.PURGE_ROWS.inc(len(ids))
+            if self.pause:
+                self._stop.wait(self.pause)
+        else:
+            return purged
+
+        file_record = db.query(UploadFileRecord).filter(UploadFileRecord.id == file_id).first()
+        if file_record is not None:
+            # 删除物理文件
+            if file_record.file_path and os.path.exists(file_record.file_path):
+                os.remove(file_record.file_path)
+            db.delete(file_record)
+            db.commit()
+        logger.info(f"文件 {file_id} 清理完成，共删除 {purged} 行数据")
+        return purged
+
+
+purger = Purger()
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -48,4 +48,25 @@ class ErrorResponse(BaseModel):
     """错误响应"""
     code: int
     message: str
-    details: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    details: Optional[Dict[str, Any]] = None
+
+class UploadSessionCreate(BaseModel):
+    """创建分片上传会话"""
+    filename: str
+    total_size: int = Field(..., ge=1, description="文件总字节数")
+    chunk_size: int = Field(8 * 1024 * 1024, ge=1, description="分片字节数，最后一片可以较短")
+    sha256: Optional[str] = Field(None, description="整个文件的 SHA-256，也可以在完成时提供")
+
+class UploadSessionResponse(BaseModel):
+    """分片上传会话状态"""
+    upload_id: str
+    filename: str
+    total_size: int
+    chunk_size: int
+    total_chunks: int
+    received_chunks: List[int]
+    completed: bool
+
+class UploadSessionComplete(BaseModel):
+    """完成分片上传"""
+    sha256: Optional[str] = None
@@ -0,0 +1,46 @@
+import json
+import logging
+import queue
+import threading
+
+import sounddevice as sd
+from vosk import Model, KaldiRecognizer
+
+from config import VOSK_MODEL_PATH
+
+logger = logging.getLogger(__name__)
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model() -> Model:
+    """加载离线模型（只加载一次，确保模型路径正确）"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = Model(VOSK_MODEL_PATH)
+    return _model
+
+
+def speech_to_text() -> str:
+    """从麦克风录音直到识别出一句话"""
+    recognizer = KaldiRecognizer(get_model(), 16000)  # 设置采样率为 16kHz
+    audio_queue = queue.Queue()
+
+    def callback(indata, frames, time, status):
+        if status:
+            logger.info(f"状态错误: {status}")
+        audio_queue.put(bytes(indata))
+
+    print("请开始说话...")
+    with sd.RawInputStream(samplerate=16000, blocksize=8000, dtype="int16",
+                           channels=1, callback=callback):
+        while True:
+            data = audio_queue.get()
+            if recognizer.AcceptWaveform(data):
+                result = recognizer.Result()
+                result = json.loads(result)['text']
+                result = result.replace(' ', '')
+                return result
@@ -0,0 +1,47 @@
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 子系统名 -> 模块名，模块在顶层导入各自的重依赖
+SUBSYSTEM_MODULES = {
+    "ingest": "ingest",    # pandas, pymysql
+    "speech": "speech",    # sounddevice, vosk
+    "chat": "chat",        # ollama, pyttsx3
+}
+
+_loaded = {}
+_load_seconds = {}
+_lock = threading.Lock()
+
+
+def load(name: str):
+    """按需加载子系统，第一次调用时导入并记录耗时"""
+    module = _loaded.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        if name not in _loaded:
+            start = time.perf_counter()
+            _loaded[name] = importlib.import_module(SUBSYSTEM_MODULES[name])
+            _load_seconds[name] = time.perf_counter() - start
+            logger.info(f"子系统 {name} 加载完成，耗时 {_load_seconds[name]:.3f}s")
+        return _loaded[name]
+
+
+def is_loaded(name: str) -> bool:
+    return name in _loaded
+
+
+def report(enabled: set) -> dict:
+    """各子系统的启用/加载状态及加载耗时"""
+    return {
+        name: {
+            "enabled": name in enabled,
+            "loaded": name in _loaded,
+            "load_seconds": round(_load_seconds[name], 4) if name in _load_seconds else None,
+        }
+        for name in SUBSYSTEM_MODULES
+    }
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import time
+
+import pytest
+
+import chunked_upload
+from chunked_upload import UploadSessionError
+
+DATA = bytes(range(256)) * 10  # 2560 字节
+CHUNK = 1000
+
+
+@pytest.fixture(autouse=True)
+def session_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunked_upload, "SESSION_DIR", str(tmp_path / "sessions"))
+    return tmp_path
+
+
+def new_session(sha256=None):
+    sha256 = sha256 or hashlib.sha256(DATA).hexdigest()
+    return chunked_upload.create_session("data.csv", len(DATA), CHUNK, sha256)
+
+
+def put_chunk(session, index, data=DATA):
+    session = chunked_upload.get_session(session.upload_id)
+    f, length = session.open_chunk(index)
+    try:
+        session.write_chunk(f, data[index * CHUNK:index * CHUNK + length])
+    finally:
+        f.close()
+    session.mark_received(index)
+
+
+def test_out_of_order_chunks_assemble_file(session_dir):
+    session = new_session()
+    assert session.total_chunks == 3
+    assert session.chunk_length(2) == len(DATA) - 2 * CHUNK
+
+    for index in (2, 0):
+        put_chunk(session, index)
+    assert session.missing_chunks() == [1]
+    assert session.to_dict()["completed"] is False
+
+    put_chunk(session, 1)
+    target = str(session_dir / "data.csv")
+    session.claim()
+    session.verify()
+    session.move_to(target)
+
+    with open(target, "rb") as f:
+        assert f.read() == DATA
+    assert os.listdir(chunked_upload.SESSION_DIR) == []
+
+
+def test_chunk_index_out_of_range():
+    session = new_session()
+    with pytest.raises(UploadSessionError):
+        session.chunk_length(3)
+
+
+def test_verify_requires_all_chunks():
+    session = new_session()
+    put_chunk(session, 0)
+    with pytest.raises(UploadSessionError) as exc:
+        session.verify()
+    assert exc.value.status_code == 409
+
+
+def test_checksum_failure_releases_session_for_retry():
+    session = new_session()
+    corrupted = b"\x00" * CHUNK + DATA[CHUNK:]
+    put_chunk(session, 0, corrupted)
+    for index in (1, 2):
+        put_chunk(session, index)
+
+    session.claim()
+    with pytest.raises(UploadSessionError) as exc:
+        session.verify()
+    assert exc.value.status_code == 422
+    session.release()
+
+    # 释放后可以重传出错的分片并再次完成
+    put_chunk(session, 0)
+    session.claim()
+    session.verify()
+
+
+def test_claimed_session_rejects_chunks():
+    session = new_session()
+    put_chunk(session, 0)
+    # 分片请求在完成占用会话之前已打开文件
+    late = chunked_upload.get_session(session.upload_id)
+    f, _ = late.open_chunk(0)
+    try:
+        session.claim()
+        with pytest.raises(UploadSessionError) as exc:
+            late.write_chunk(f, b"x" * CHUNK)
+        assert exc.value.status_code == 409
+    finally:
+        f.close()
+
+    with pytest.raises(UploadSessionError) as exc:
+        chunked_upload.get_session(session.upload_id)
+    assert exc.value.status_code == 409
+    with pytest.raises(UploadSessionError) as exc:
+        session.claim()
+    assert exc.value.status_code == 409
+
+    # 会话被移走后，迟到的请求得到 404 而不是文件不存在的异常
+    session.discard()
+    with pytest.raises(UploadSessionError) as exc:
+        late.mark_received(0)
+    assert exc.value.status_code == 404
+
+
+def test_get_session_rejects_unknown_ids():
+    for upload_id in ("../etc/passwd", "00000000-0000-0000-0000-000000000000"):
+        with pytest.raises(UploadSessionError) as exc:
+            chunked_upload.get_session(upload_id)
+        assert exc.value.status_code == 404
+
+
+def test_cleanup_expires_idle_sessions_only(monkeypatch):
+    monkeypatch.setattr(chunked_upload, "UPLOAD_SESSION_TTL_SECONDS", 60)
+    idle, active = new_session(), new_session()
+    past = time.time() - 120
+    for session in (idle, active):
+        for path in (session.meta_path, session.part_path, session.bitmap_path):
+            os.utime(path, (past, past))
+    # 创建时间早于有效期，但仍在上传分片的会话不会被清理
+    put_chunk(active, 0)
+
+    chunked_upload.cleanup_expired()
+
+    assert not os.path.exists(idle.part_path)
+    assert chunked_upload.get_session(active.upload_id).received_chunks() == [0]
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import UploadFileRecord, ImportedData
+from purger import Purger, DELETED_STATUS
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'purge.db'}")
+    Base.metadata.create_all(bind=engine, tables=[UploadFileRecord.__table__, ImportedData.__table__])
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def add_file(db, tmp_path, file_id: str, rows: int, status: str):
+    path = tmp_path / f"{file_id}.csv"
+    path.write_text("x")
+    db.add(UploadFileRecord(
+        id=file_id, filename=path.name, original_filename=path.name, file_size=1,
+        file_type="csv", file_path=str(path), status=status,
+    ))
+    db.add_all(ImportedData(file_id=file_id, row_index=i + 1, data={"i": i}) for i in range(rows))
+    db.commit()
+
+
+def test_purges_deleted_files_in_chunks(session_factory, tmp_path):
+    db = session_factory()
+    add_file(db, tmp_path, "deleted", 25, DELETED_STATUS)
+    add_file(db, tmp_path, "kept", 3, "completed")
+
+    purger = Purger(session_factory, chunk_size=10, pause=0)
+    assert purger.run_once() == 25
+
+    assert db.query(ImportedData).filter(ImportedData.file_id == "deleted").count() == 0
+    assert db.query(UploadFileRecord).filter(UploadFileRecord.id == "deleted").first() is None
+    assert not (tmp_path / "deleted.csv").exists()
+    assert db.query(ImportedData).filter(ImportedData.file_id == "kept").count() == 3
+    assert (tmp_path / "kept.csv").exists()
+    db.close()
+
+
+def test_stop_keeps_record_until_rows_are_gone(session_factory, tmp_path):
+    db = session_factory()
+    add_file(db, tmp_path, "deleted", 25, DELETED_STATUS)
+
+    purger = Purger(session_factory, chunk_size=10, pause=0)
+    purger._stop.set()
+    # 停止时提前返回，不删除文件记录，下次启动继续清理
+    assert purger.purge_file(db, "deleted") == 0
+    assert db.query(UploadFileRecord).filter(UploadFileRecord.id == "deleted").first() is not None
+
+    purger._stop.clear()
+    assert purger.run_once() == 25
+    assert db.query(UploadFileRecord).count() == 0
+    db.close()
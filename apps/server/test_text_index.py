@@ -0,0 +1,63 @@
+from array import array
+
+import ingest
+import text_index
+
+
+def write_lines(tmp_path, content: bytes) -> str:
+    path = tmp_path / "log.txt"
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_index_packs_offset_and_line_number(tmp_path):
+    path = write_lines(tmp_path, b"first\n\nsecond\n   \nthird")
+    assert text_index.build_index(path) == 3
+
+    entries = array("Q")
+    with open(text_index.index_path(path), "rb") as f:
+        entries.frombytes(f.read())
+    # (行起始偏移, 原文件行号) 成对存放
+    assert list(entries) == [0, 1, 7, 3, 18, 5]
+
+
+def test_read_page_matches_parse_text_file(tmp_path):
+    # 全角空格行与 parse_text_file 一样按空行跳过
+    content = "a\n　　\n  b  \n\nc\r\nd\n".encode("utf-8")
+    path = write_lines(tmp_path, content)
+    text_index.build_index(path)
+
+    with text_index.LineIndex(path) as index:
+        assert len(index) == 4
+        assert index.read_page(0, 10) == [(1, 1, "a"), (2, 3, "b"), (3, 5, "c"), (4, 6, "d")]
+        assert index.read_page(2, 1) == [(3, 5, "c")]
+        assert index.read_page(10, 5) == []
+        rows = [{"line_number": n, "content": c} for _, n, c in index.read_page(0, 10)]
+
+    assert rows == ingest.parse_text_file(path)[0]
+
+
+def test_empty_file(tmp_path):
+    path = write_lines(tmp_path, b"\n\n")
+    assert text_index.build_index(path) == 0
+    with text_index.LineIndex(path) as index:
+        assert len(index) == 0
+        assert index.read_page(0, 10) == []
+
+
+def test_index_flushed_in_blocks(tmp_path):
+    # 超过一次分段写盘的行数，分段写入后偏移和行号仍连续正确
+    lines = 40000
+    path = write_lines(tmp_path, b"".join(b"%05d\n" % i for i in range(lines)))
+    assert text_index.build_index(path) == lines
+    with text_index.LineIndex(path) as index:
+        assert index.read_page(lines - 1, 1) == [(lines, lines, "%05d" % (lines - 1))]
+
+
+def test_remove_index(tmp_path):
+    path = write_lines(tmp_path, b"x\n")
+    text_index.build_index(path)
+    assert text_index.has_index(path)
+    text_index.remove_index(path)
+    assert not text_index.has_index(path)
+    text_index.remove_index(path)
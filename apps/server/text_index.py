@@ -0,0 +1,93 @@
+import mmap
+import os
+from array import array
+
+# 索引文件: 每个非空行两个 uint64，(行起始偏移, 原文件行号)
+INDEX_SUFFIX = ".idx"
+
+# 文件记录 storage 字段的取值，表示数据按行偏移索引从原文件读取
+LINE_INDEX_STORAGE = "line_index"
+_ITEMSIZE = array("Q").itemsize
+
+
+def index_path(file_path: str) -> str:
+    return file_path + INDEX_SUFFIX
+
+
+def has_index(file_path: str) -> bool:
+    return os.path.exists(index_path(file_path))
+
+
+def build_index(file_path: str) -> int:
+    """顺序扫描一遍文本文件，为非空行建立偏移索引，返回非空行数"""
+    entries = array("Q")
+    tmp_path = index_path(file_path) + ".tmp"
+    total = 0
+    with open(file_path, "rb") as f, open(tmp_path, "wb") as out:
+        offset = 0
+        for line_number, line in enumerate(f, start=1):
+            # 跳过空行，解码后再判断，与 parse_text_file 一样忽略全角空格等空白
+            if line.decode("utf-8", errors="replace").strip():
+                entries.append(offset)
+                entries.append(line_number)
+                total += 1
+            offset += len(line)
+            # 分段写盘，索引不整个留在内存里
+            if len(entries) >= 1 << 16:
+                entries.tofile(out)
+                del entries[:]
+        entries.tofile(out)
+    os.replace(tmp_path, index_path(file_path))
+    return total
+
+
+def remove_index(file_path: str):
+    if has_index(file_path):
+        os.remove(index_path(file_path))
+
+
+class LineIndex:
+    """通过内存映射按行号随机读取已建索引的文本文件"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._files = []
+        self._data = self._map(file_path)
+        index = self._map(index_path(file_path))
+        self._entries = memoryview(index).cast("Q") if index is not None else None
+
+    def _map(self, path: str):
+        f = open(path, "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._files.append(m)
+        return m
+
+    def __len__(self) -> int:
+        return len(self._entries) // 2 if self._entries is not None else 0
+
+    def read_page(self, skip: int, limit: int) -> list:
+        """读取第 skip 个非空行起的 limit 行，返回 [(行序号, 原文件行号, 内容)]"""
+        rows = []
+        for i in range(skip, min(skip + limit, len(self))):
+            start, line_number = self._entries[2 * i], self._entries[2 * i + 1]
+            end = self._data.find(b"\n", start)
+            line = self._data[start:end if end != -1 else len(self._data)]
+            rows.append((i + 1, line_number, line.decode("utf-8", errors="replace").strip()))
+        return rows
+
+    def close(self):
+        if self._entries is not None:
+            self._entries.release()
+            self._entries = None
+        for f in reversed(self._files):
+            f.close()
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()